@@ -0,0 +1,75 @@
+# Measures cold start for `python -m trello audit --help` using `python -X importtime`
+# (Python 3.7+). It prints the slowest imports and fails if the CLI's import time goes
+# over the budget or if a heavy dependency got imported just to print help.
+#
+#   python bench_startup.py [--budget_ms 25] [--runs 5]
+#
+# The interpreter's own startup imports (site, encodings, anything .pth files pull in) vary
+# a lot between machines, so the budget only covers the modules that a bare `python -c pass`
+# doesn't import. Those are added up from their self times, which counts each module once
+# and doesn't depend on how long the interpreter itself took to start.
+
+from __future__ import print_function
+
+import argparse
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['requests', 'texttable', 'settings', 'json']
+
+def parse_importtime(stderr):
+  # lines look like: "import time:       123 |        456 | package.module"
+  imports = []
+  for line in stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    self_us, cumulative_us, name = line[len('import time:'):].split('|')
+    imports.append((int(cumulative_us), int(self_us), name.strip()))
+  return imports
+
+def added_imports(imports, baseline_modules):
+  return [(c, s, name) for c, s, name in imports if name.strip() not in baseline_modules]
+
+def run_once(command):
+  env = dict(os.environ)
+  env.pop('PYTHONSTARTUP', None)
+  proc = subprocess.Popen([sys.executable, '-X', 'importtime'] + command,
+      stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env,
+      cwd=os.path.dirname(os.path.abspath(__file__)), universal_newlines=True)
+  stdout, stderr = proc.communicate()
+  if proc.returncode != 0:
+    raise SystemExit('%s exited with %s:\n%s' % (' '.join(command), proc.returncode, stderr))
+  return parse_importtime(stderr)
+
+def main():
+  parser = argparse.ArgumentParser(description="Import-time benchmark for the trello CLI.")
+  parser.add_argument("--budget_ms", type=float, default=25.0, help="fail if the modules a bare interpreter doesn't import take longer than this (default: 25)")
+  parser.add_argument("--runs", type=int, default=5, help="how many times to start the CLI; the best run is reported (default: 5)")
+  args = parser.parse_args()
+
+  baseline_modules = set(name.strip() for c, s, name in run_once(['-c', 'pass']))
+  command = ['-m', 'trello', 'audit', '--help']
+  runs = [added_imports(run_once(command), baseline_modules) for _ in range(args.runs)]
+  added_us = [sum(s for c, s, name in imports) for imports in runs]
+  best = runs[added_us.index(min(added_us))]
+  added_ms = min(added_us) / 1000.0
+
+  print('slowest imports not done by a bare interpreter (cumulative ms):')
+  for cumulative_us, self_us, name in sorted(best, reverse=True)[:10]:
+    print('  %8.2f  %s' % (cumulative_us / 1000.0, name))
+  print('added by `trello audit --help`: %.2f ms in %s modules (best of %s, budget %.2f ms)' % (added_ms, len(best), args.runs, args.budget_ms))
+
+  imported = set(name.strip() for c, s, name in best)
+  heavy = [m for m in HEAVY_MODULES if m in imported]
+  if heavy:
+    print('FAIL: imported %s just to print help' % ', '.join(heavy))
+    return 1
+  if added_ms > args.budget_ms:
+    print('FAIL: over budget')
+    return 1
+  print('OK')
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,211 @@
+import gzip
+import json
+import random
+import struct
+
+import pytest
+
+from trello.archive import write_archive, read_archive, read_columns
+from trello.snapshot import build_snapshot, save_snapshot, load_snapshot
+
+ALICE = '5a1b2c3d4e5f60718293a4b5'
+BOB = '5a1b2c3d4e5f60718293a4b6'
+EVE = '6f00000000000000000000ee'
+PLANS = '5b0000000000000000000001'
+SECRETS = '5b0000000000000000000002'
+
+def org_snapshot():
+  org_memberships = [
+    {'idMember': ALICE, 'memberType': 'admin', 'deactivated': False, 'unconfirmed': False,
+     'member': {'username': 'alice', 'fullName': u'Alice Aar\u00f8'}},
+    {'idMember': BOB, 'memberType': 'normal', 'deactivated': True, 'unconfirmed': True,
+     'member': {'username': 'bob', 'fullName': 'Bob'}},
+  ]
+  org_boards = [
+    {'id': PLANS, 'name': 'Plans', 'shortUrl': 'https://trello.com/b/plans', 'closed': False},
+    {'id': SECRETS, 'name': 'Secrets', 'shortUrl': 'https://trello.com/b/secrets', 'closed': True},
+  ]
+  board_memberships_by_board = {
+    PLANS: [
+      {'idMember': BOB, 'memberType': 'normal', 'unconfirmed': False, 'deactivated': True},
+      {'idMember': ALICE, 'memberType': 'admin', 'unconfirmed': False, 'deactivated': False},
+    ],
+    SECRETS: [
+      # eve isn't in the org, so her org_member_type and org_unconfirmed are None
+      {'idMember': EVE, 'memberType': 'observer', 'unconfirmed': True, 'deactivated': False,
+       'member': {'username': 'eve', 'fullName': 'Eve'}},
+      {'idMember': ALICE, 'memberType': 'admin', 'unconfirmed': False, 'deactivated': False},
+    ],
+  }
+  return build_snapshot('myorg', org_memberships, org_boards, board_memberships_by_board)
+
+def test_mixed_bool_and_int_column_round_trips(tmp_path):
+  org_memberships = [
+    {'idMember': 'a', 'memberType': 'normal', 'deactivated': False, 'unconfirmed': False,
+     'member': {'username': True, 'fullName': 'A'}},
+    {'idMember': 'b', 'memberType': 'normal', 'deactivated': False, 'unconfirmed': False,
+     'member': {'username': 1, 'fullName': 'B'}},
+  ]
+  snapshot = build_snapshot('o', org_memberships, [], {})
+  path = str(tmp_path / 's.trsnap')
+  write_archive(snapshot, path)
+
+  usernames = [row[1] for row in read_archive(path)['members']['rows']]
+  assert [(type(u), u) for u in usernames] == [(bool, True), (int, 1)]
+
+def test_saving_over_an_existing_archive_replaces_it(tmp_path):
+  path = str(tmp_path / 's.trsnap')
+  write_archive(build_snapshot('old', [], [], {}), path)
+  write_archive(build_snapshot('new', [], [], {}), path)
+
+  assert read_archive(path)['org'] == 'new'
+  assert not (tmp_path / 's.trsnap.tmp').exists()
+
+def test_ids_that_only_look_like_hex_are_kept_as_written(tmp_path):
+  for ids in (['0a', '0b ', '0c'], ['0a', '0B', '0c'], ['0a', '0b', '0c0d']):
+    org_memberships = [{'idMember': id_member, 'memberType': 'normal', 'deactivated': False, 'unconfirmed': False,
+                        'member': {'username': id_member, 'fullName': id_member}} for id_member in ids]
+    path = str(tmp_path / 's.trsnap')
+    write_archive(build_snapshot('o', org_memberships, [], {}), path)
+    assert [row[0] for row in read_archive(path)['members']['rows']] == ids
+
+def test_snapshot_round_trips(tmp_path):
+  snapshot = org_snapshot()
+  path = str(tmp_path / 's.trsnap')
+  write_archive(snapshot, path)
+
+  assert read_archive(path) == snapshot
+  # the ids went in as packed hex and the memberships as row numbers, not as text
+  with open(path, 'rb') as f:
+    data = f.read()
+  assert ALICE.encode('ascii') not in data and b'alice' not in data
+
+def test_read_columns_loads_only_the_columns_asked_for(tmp_path):
+  path = str(tmp_path / 's.trsnap')
+  write_archive(org_snapshot(), path)
+
+  columns = read_columns(path, {'members': ['username', 'org_unconfirmed'], 'memberships': ['idMember']})
+
+  assert columns == {
+    'members': {'username': ['alice', 'bob', 'eve'], 'org_unconfirmed': [False, True, None]},
+    'memberships': {'idMember': [ALICE, BOB, ALICE, EVE]},
+  }
+  assert sorted(read_columns(path, {'boards': None})['boards']) == ['closed', 'id', 'name', 'shortUrl']
+
+def test_load_snapshot_tells_archives_from_json(tmp_path):
+  snapshot = org_snapshot()
+  for name in ('s.trsnap', 's.json', 's.json.gz'):
+    path = str(tmp_path / name)
+    save_snapshot(snapshot, path)
+    assert load_snapshot(path) == snapshot
+
+  with open(str(tmp_path / 's.trsnap'), 'rb') as f:
+    assert f.read(1) != b'{'
+  with gzip.open(str(tmp_path / 's.json.gz'), 'rb') as f:
+    assert json.loads(f.read().decode('utf-8')) == snapshot
+
+def next_day(snapshot):
+  snapshot = json.loads(json.dumps(snapshot))
+  snapshot['members']['rows'][1][1] = 'bobby'
+  snapshot['members']['rows'].append(['7a00000000000000000000aa', 'zed', 'Zed', True, 'normal', False, False])
+  memberships = snapshot['memberships']['rows']
+  del memberships[0]
+  memberships.append(['7a00000000000000000000aa', SECRETS, 'normal', False, False])
+  return snapshot
+
+def by_row(snapshot):
+  snapshot = dict(snapshot)
+  snapshot['memberships'] = {'fields': snapshot['memberships']['fields'],
+                             'rows': sorted(snapshot['memberships']['rows'])}
+  return snapshot
+
+def test_delta_against_a_base_round_trips(tmp_path):
+  base, today = org_snapshot(), next_day(org_snapshot())
+  write_archive(base, str(tmp_path / 'base.trsnap'))
+  write_archive(today, str(tmp_path / 'today.trsnap'), base=str(tmp_path / 'base.trsnap'))
+
+  assert by_row(read_archive(str(tmp_path / 'today.trsnap'))) == by_row(today)
+  assert read_columns(str(tmp_path / 'today.trsnap'), {'members': ['username']}) == {
+    'members': {'username': ['alice', 'bobby', 'eve', 'zed']}}
+  # only bobby, who changed, and zed, who is new, are stored again; the rest come from the base
+  tables = archive_header(str(tmp_path / 'today.trsnap'))['tables']
+  assert tables['members']['delta']['stored_rows'] == 2
+  assert tables['boards']['delta']['stored_rows'] == 0
+  assert tables['memberships']['delta']['stored_rows'] == 1
+
+def test_deltas_can_chain(tmp_path):
+  day1 = org_snapshot()
+  day2 = next_day(day1)
+  day3 = json.loads(json.dumps(day2))
+  day3['boards']['rows'][1][3] = False
+  day3['memberships']['rows'].append([BOB, SECRETS, 'normal', False, False])
+  paths = [str(tmp_path / ('day%d.trsnap' % i)) for i in (1, 2, 3)]
+  write_archive(day1, paths[0])
+  write_archive(day2, paths[1], base=paths[0])
+  write_archive(day3, paths[2], base=paths[1])
+
+  assert by_row(load_snapshot(paths[2])) == by_row(day3)
+  assert by_row(load_snapshot(paths[1])) == by_row(day2)
+
+def test_delta_keeps_duplicate_rows(tmp_path):
+  base = org_snapshot()
+  today = json.loads(json.dumps(base))
+  today['memberships']['rows'].append(list(today['memberships']['rows'][0]))
+  write_archive(base, str(tmp_path / 'base.trsnap'))
+  write_archive(today, str(tmp_path / 'today.trsnap'), base=str(tmp_path / 'base.trsnap'))
+
+  assert by_row(read_archive(str(tmp_path / 'today.trsnap'))) == by_row(today)
+
+def test_delta_refuses_a_base_that_changed(tmp_path):
+  base = str(tmp_path / 'base.trsnap')
+  write_archive(org_snapshot(), base)
+  write_archive(next_day(org_snapshot()), str(tmp_path / 'today.trsnap'), base=base)
+  write_archive(next_day(org_snapshot()), base)
+
+  with pytest.raises(ValueError):
+    read_archive(str(tmp_path / 'today.trsnap'))
+
+def test_memberships_come_back_by_board_then_member(tmp_path):
+  snapshot = org_snapshot()
+  snapshot['memberships']['rows'].reverse()
+  path = str(tmp_path / 's.trsnap')
+  write_archive(snapshot, path)
+
+  assert read_archive(path)['memberships'] == org_snapshot()['memberships']
+
+def archive_header(path):
+  with open(path, 'rb') as f:
+    f.read(8)
+    header_length, = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(header_length).decode('utf-8'))
+
+def test_long_chains_start_over_with_a_full_archive(tmp_path):
+  paths = [str(tmp_path / ('day%d.trsnap' % i)) for i in range(4)]
+  write_archive(org_snapshot(), paths[0])
+  for i in range(1, 4):
+    write_archive(org_snapshot(), paths[i], base=paths[i - 1], max_chain=2)
+
+  assert [archive_header(path).get('chain') for path in paths] == [None, 1, 2, None]
+  assert 'base' not in archive_header(paths[3])
+  assert read_archive(paths[3]) == org_snapshot()
+
+def test_a_month_of_random_changes_round_trips(tmp_path):
+  random.seed(5)
+  member_ids = ['%024x' % i for i in range(40)]
+  board_ids = ['%024x' % (1000 + i) for i in range(8)]
+  def snapshot():
+    org_memberships = [{'idMember': m, 'memberType': random.choice(['normal', 'admin']), 'deactivated': False,
+                        'unconfirmed': False, 'member': {'username': m[-2:], 'fullName': m}} for m in member_ids[:30]]
+    org_boards = [{'id': b, 'name': b[-2:], 'shortUrl': None, 'closed': False} for b in board_ids]
+    board_memberships_by_board = dict((b, [{'idMember': m, 'memberType': 'normal', 'unconfirmed': False,
+                                            'deactivated': random.random() < 0.1,
+                                            'member': {'username': m[-2:], 'fullName': m}}
+                                           for m in random.sample(member_ids, 12)]) for b in board_ids)
+    return build_snapshot('o', org_memberships, org_boards, board_memberships_by_board)
+
+  path = None
+  for day in range(30):
+    base, path = path, str(tmp_path / ('day%d.trsnap' % day))
+    today = snapshot()
+    write_archive(today, path, base=base, max_chain=10)
+    assert by_row(read_archive(path)) == by_row(today)
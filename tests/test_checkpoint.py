@@ -0,0 +1,55 @@
+import pytest
+
+from trello import audit
+from trello.checkpoint import CheckpointError, CheckpointJournal, load_checkpoint
+
+BOARDS = [{'id': 'b1'}, {'id': 'b2'}]
+
+@pytest.fixture
+def fake_api(monkeypatch):
+  fetched = []
+
+  def get_board_memberships(id_board):
+    fetched.append(id_board)
+    return [{'idMember': 'm', 'board': id_board}]
+
+  monkeypatch.setattr(audit, 'get_org_memberships', lambda id_org: [])
+  monkeypatch.setattr(audit, 'get_org_boards', lambda id_org: BOARDS)
+  monkeypatch.setattr(audit, 'get_board_memberships', get_board_memberships)
+  return fetched
+
+def test_resume_skips_boards_in_the_journal(tmp_path, fake_api):
+  path = str(tmp_path / 'o.audit-checkpoint')
+  journal = CheckpointJournal(path, 'o')
+  journal.board_done('b1', [{'idMember': 'm'}])
+  journal.close()
+  with open(path, 'ab') as f:
+    f.write(b'{"board":"b2","mem')
+
+  org_memberships, org_boards, board_memberships = audit.crawl_org('o', path, resume=True)
+  assert fake_api == ['b2']
+  assert sorted(board_memberships) == ['b1', 'b2']
+
+def test_empty_journal_starts_over(tmp_path, fake_api):
+  path = tmp_path / 'o.audit-checkpoint'
+  path.write_bytes(b'')
+  assert load_checkpoint(str(path), 'o') is None
+
+  crawl = audit.crawl_org('o', str(path), resume=True)
+  assert fake_api == ['b1', 'b2']
+  assert sorted(crawl[2]) == ['b1', 'b2']
+
+def test_torn_header_starts_over(tmp_path):
+  path = tmp_path / 'o.audit-checkpoint'
+  path.write_bytes(b'{"org":"o')
+  assert load_checkpoint(str(path), 'o') is None
+
+def test_journal_for_another_org_is_reported(tmp_path, fake_api, capsys):
+  path = str(tmp_path / 'o.audit-checkpoint')
+  CheckpointJournal(path, 'other').close()
+  with pytest.raises(CheckpointError):
+    load_checkpoint(path, 'o')
+
+  assert audit.crawl_org('o', path, resume=True) is None
+  assert "can't resume" in capsys.readouterr().err
+  assert fake_api == []
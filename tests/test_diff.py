@@ -0,0 +1,80 @@
+import pytest
+
+from trello.diff import diff_snapshots
+from trello.snapshot import build_snapshot, save_snapshot, load_snapshot
+
+def org_membership(id_member, member_type='normal', deactivated=False):
+  return {'idMember': id_member, 'memberType': member_type, 'deactivated': deactivated, 'unconfirmed': False,
+          'member': {'username': id_member, 'fullName': id_member.title()}}
+
+def board_membership(id_member, member_type='normal', deactivated=False):
+  return {'idMember': id_member, 'memberType': member_type, 'deactivated': deactivated, 'unconfirmed': False,
+          'member': {'username': id_member, 'fullName': id_member.title()}}
+
+BOARDS = [{'id': 'b1', 'name': 'Roadmap', 'shortUrl': 'https://trello.com/b/1', 'closed': False}]
+
+def snapshot(org_memberships, board_memberships):
+  return build_snapshot('o', org_memberships, BOARDS, {'b1': board_memberships})
+
+def changes(old, new):
+  return sorted((c['change'], c['id_member']) + tuple(sorted((k, v) for k, v in c.items() if k not in ('change', 'id_member', 'username')))
+                for c in diff_snapshots(old, new))
+
+def test_identical_snapshots_have_no_changes():
+  s = snapshot([org_membership('alice')], [board_membership('alice')])
+  assert list(diff_snapshots(s, s)) == []
+
+def test_member_added_and_removed():
+  old = snapshot([org_membership('alice')], [])
+  new = snapshot([org_membership('bob', 'admin')], [])
+  assert changes(old, new) == [
+    ('member_added', 'bob', ('org_member', True), ('org_member_type', 'admin')),
+    ('member_removed', 'alice', ('org_member', True), ('org_member_type', 'normal')),
+  ]
+
+def test_org_join_and_leave():
+  # carol starts out only on a board and then joins the org; dave goes the other way
+  old = snapshot([org_membership('dave')], [board_membership('carol'), board_membership('dave')])
+  new = snapshot([org_membership('carol')], [board_membership('carol'), board_membership('dave')])
+  assert [c[:2] for c in changes(old, new) if c[0] in ('org_joined', 'org_left')] == [
+    ('org_joined', 'carol'),
+    ('org_left', 'dave'),
+  ]
+
+def test_member_type_change():
+  old = snapshot([org_membership('alice', 'normal')], [])
+  new = snapshot([org_membership('alice', 'admin')], [])
+  assert changes(old, new) == [('member_type_changed', 'alice', ('new', 'admin'), ('old', 'normal'))]
+
+def test_deactivation_and_reactivation():
+  old = snapshot([org_membership('alice'), org_membership('bob', deactivated=True)], [])
+  new = snapshot([org_membership('alice', deactivated=True), org_membership('bob')], [])
+  assert changes(old, new) == [('member_deactivated', 'alice'), ('member_reactivated', 'bob')]
+
+def test_board_access_gained_and_lost():
+  old = snapshot([org_membership('alice'), org_membership('bob')], [board_membership('alice', 'admin')])
+  new = snapshot([org_membership('alice'), org_membership('bob')], [board_membership('bob')])
+  assert changes(old, new) == [
+    ('board_access_gained', 'bob', ('board', 'Roadmap'), ('board_member_type', 'normal'), ('id_board', 'b1')),
+    ('board_access_lost', 'alice', ('board', 'Roadmap'), ('board_member_type', 'admin'), ('id_board', 'b1')),
+  ]
+
+def test_board_member_type_change_and_deactivation():
+  old = snapshot([org_membership('alice')], [board_membership('alice', 'normal')])
+  new = snapshot([org_membership('alice')], [board_membership('alice', 'admin', deactivated=True)])
+  assert changes(old, new) == [
+    ('board_deactivated', 'alice', ('board', 'Roadmap'), ('id_board', 'b1')),
+    ('board_member_type_changed', 'alice', ('board', 'Roadmap'), ('id_board', 'b1'), ('new', 'admin'), ('old', 'normal')),
+  ]
+
+@pytest.mark.parametrize('name', ['snapshot.json', 'snapshot.json.gz'])
+def test_save_and_load_round_trip(tmp_path, name):
+  s = snapshot([org_membership('alice', 'admin'), org_membership('bob', deactivated=True)],
+               [board_membership('alice'), board_membership('zed', 'observer')])
+  path = str(tmp_path / name)
+  save_snapshot(s, path)
+
+  assert load_snapshot(path) == s
+  with open(path, 'rb') as f:
+    is_gzip = f.read(2) == b'\x1f\x8b'
+  assert is_gzip == name.endswith('.gz')
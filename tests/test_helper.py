@@ -0,0 +1,59 @@
+from trello import backup, helper
+
+class FakeResponse(object):
+  ok = True
+
+  def __init__(self, body):
+    self.body = body
+
+  def json(self):
+    return self.body
+
+def test_polling_sees_status_change_inside_memo_scope(monkeypatch):
+  stages = ['Queued', 'Exporting', 'Export complete']
+  sent = []
+
+  def fake_send(method, url, data=None, stream=False):
+    sent.append((method, url))
+    return FakeResponse({'status': {'stage': stages[min(len(sent), len(stages)) - 1]}})
+
+  monkeypatch.setattr(helper, '_send', fake_send)
+  with helper.memo_scope():
+    download_url = backup.wait_for_export('org', 'export', 0)
+
+  assert download_url == 'organizations/org/exports/export/download'
+  assert len(sent) == 3
+
+def test_repeated_gets_share_one_request_inside_memo_scope(monkeypatch):
+  sent = []
+
+  def fake_send(method, url, data=None, stream=False):
+    sent.append((method, url))
+    return FakeResponse([])
+
+  monkeypatch.setattr(helper, '_send', fake_send)
+  with helper.memo_scope():
+    helper.query_trello('GET', 'boards/b/members', {'filter': 'admins'})
+    helper.query_trello('GET', 'boards/b/members', {'filter': 'admins'})
+  assert len(sent) == 1
+
+def test_memo_keeps_only_the_most_recent_responses(monkeypatch):
+  sent = []
+
+  def fake_send(method, url, data=None, stream=False):
+    sent.append(url)
+    return FakeResponse([])
+
+  monkeypatch.setattr(helper, '_send', fake_send)
+  monkeypatch.setattr(helper, 'MEMO_SIZE', 2)
+  with helper.memo_scope():
+    for url in ['boards/1', 'boards/2', 'boards/1', 'boards/3', 'boards/1', 'boards/2']:
+      helper.query_trello('GET', url)
+    assert len(helper._memo) == 2
+  # boards/1 stays memoized because it keeps getting used; boards/2 was evicted by boards/3
+  assert sent == ['boards/1', 'boards/2', 'boards/3', 'boards/2']
+
+def test_get_after_scope_ends_goes_to_the_api(monkeypatch):
+  monkeypatch.setattr(helper, '_send', lambda method, url, data=None, stream=False: FakeResponse([]))
+  assert helper._memo is None
+  assert helper._get_single_flight('boards/1', None).json() == []
@@ -0,0 +1,38 @@
+import argparse
+
+from trello import helper, lockdown
+
+class FakeResponse(object):
+  ok = True
+
+  def __init__(self, body):
+    self.body = body
+
+  def json(self):
+    return self.body
+
+def test_execute_checks_board_admins_once_per_board(monkeypatch):
+  org = {'id': 'o', 'name': 'org', 'idBoards': ['b'], 'premiumFeatures': [],
+         'memberships': [{'idMember': 'me', 'memberType': 'admin'}]}
+  sent = []
+
+  def fake_send(method, url, data=None, stream=False):
+    sent.append((method, url, data))
+    if url == 'members/me':
+      return FakeResponse({'id': 'me'})
+    if url == 'members/me/organizations':
+      return FakeResponse([org])
+    if url == 'boards/b/members' and data.get('filter') == 'admins':
+      return FakeResponse([{'id': 'me'}])
+    if url == 'boards/b/members':
+      return FakeResponse([{'id': 'me'}, {'id': 'x1'}, {'id': 'x2'}, {'id': 'x3'}])
+    return FakeResponse({})
+
+  monkeypatch.setattr(helper, '_send', fake_send)
+  with helper.memo_scope():
+    lockdown.main(argparse.Namespace(execute=True))
+
+  admin_lookups = [s for s in sent if s[1] == 'boards/b/members' and s[2].get('filter') == 'admins']
+  removals = [s for s in sent if s[0] == 'DELETE']
+  assert len(admin_lookups) == 1
+  assert len(removals) == 3
@@ -0,0 +1,33 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from trello.matrix import MembershipMatrix
+from trello.snapshot import build_snapshot
+
+def membership(id_member, member_type='normal', deactivated=False, unconfirmed=False):
+  return {'idMember': id_member, 'memberType': member_type, 'deactivated': deactivated,
+          'unconfirmed': unconfirmed, 'member': {'username': id_member, 'fullName': id_member}}
+
+def crawl(board_memberships_by_board):
+  org_memberships = [membership('a', 'admin'), membership('b')]
+  org_boards = [{'id': id_board, 'name': id_board} for id_board in sorted(board_memberships_by_board)]
+  return org_memberships, org_boards, board_memberships_by_board
+
+def test_deactivated_admins_dont_count_as_coverage():
+  matrix = MembershipMatrix.from_crawl(*crawl({
+    'covered': [membership('a', 'admin'), membership('b')],
+    'only_deactivated_admin': [membership('a', 'admin', deactivated=True), membership('b')],
+  }))
+  assert matrix.admin_counts().tolist() == [1, 0]
+  assert matrix.boards_without_admins() == ['only_deactivated_admin']
+
+def test_from_snapshot_matches_from_crawl_and_diffs():
+  old_crawl = crawl({'b1': [membership('a', 'admin'), membership('x')]})
+  new_crawl = crawl({'b1': [membership('a', 'admin'), membership('b')]})
+  old = MembershipMatrix.from_snapshot(build_snapshot('o', *old_crawl))
+  new = MembershipMatrix.from_snapshot(build_snapshot('o', *new_crawl))
+
+  assert old.external_member_ids() == MembershipMatrix.from_crawl(*old_crawl).external_member_ids() == ['x']
+  assert new.difference(old) == [('b', 'b1')]
+  assert old.difference(new) == [('x', 'b1')]
@@ -0,0 +1,49 @@
+from trello import profiling
+from trello.profiling import profiled, span
+
+def test_profiled_records_nested_spans(tmp_path, monkeypatch):
+  now = [0.0]
+  monkeypatch.setattr(profiling, '_clock', lambda: now[0])
+  out_path = str(tmp_path / 'run.folded')
+
+  with profiled('root', out_path) as profile:
+    now[0] += 1
+    with span('a'):
+      now[0] += 2
+      with span('b'):
+        now[0] += 4
+      now[0] += 1
+    now[0] += 2
+
+  with open(out_path) as f:
+    assert f.read().splitlines() == [
+      'root 3000000',
+      'root;a 3000000',
+      'root;a;b 4000000',
+    ]
+  # stage -> [calls, total seconds, self seconds, bytes allocated]
+  assert profile.stages == {
+    'root': [1, 10.0, 3.0, 0],
+    'a': [1, 7.0, 3.0, 0],
+    'b': [1, 4.0, 4.0, 0],
+  }
+  assert profile.wall_time == 10.0
+
+def test_repeated_spans_add_up(tmp_path, monkeypatch):
+  now = [0.0]
+  monkeypatch.setattr(profiling, '_clock', lambda: now[0])
+
+  with profiled('root', str(tmp_path / 'run.folded')) as profile:
+    for _ in range(3):
+      with span('fetch'):
+        now[0] += 0.5
+
+  assert profile.stages['fetch'][:3] == [3, 1.5, 1.5]
+  assert profile.self_times['root;fetch'] == 1.5
+
+def test_span_does_nothing_when_profiling_is_off():
+  assert profiling._profile is None
+  with span('fetch'):
+    with span('decode'):
+      pass
+  assert profiling._profile is None
@@ -0,0 +1,11 @@
+# The trello package holds the scripts from this repo as importable modules.
+#
+# Nothing in here talks to the API or reads settings.py when you import it; that only
+# happens once you call a function. Run the tools with:
+#
+#   python -m trello audit --org <orgname>
+#   python -m trello backup --id_organization <orgname>
+#   python -m trello offboard --email joe@example.com
+#   python -m trello lockdown
+#
+# See trello/cli.py for the full list of arguments.
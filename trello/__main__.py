@@ -0,0 +1,5 @@
+import sys
+
+from trello.cli import main
+
+sys.exit(main())
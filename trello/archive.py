@@ -0,0 +1,583 @@
+# A compact, columnar file format for audit snapshots (see trello/snapshot.py).
+#
+# JSON snapshots repeat every id, username and member type on every row. An archive stores
+# each column of the members, boards and memberships tables as its own zlib-compressed block:
+#
+# - ids that look like Trello ids (hex strings) are packed down to raw bytes
+# - other strings are dictionary-encoded: the distinct values once, then one small int per row
+# - memberships point at members and boards by row number instead of repeating their ids.
+#   They're stored sorted by board and then member, so the board column is just a list of
+#   (board, how many memberships) runs, and the member column is the gap from the previous
+#   member on the same board, which is mostly small numbers that compress well
+# - booleans are packed 8 to a byte, with a second bitmap for the ones that are None
+#
+# The file starts with a JSON header saying where each block lives, so read_columns() only
+# reads and decompresses the columns you ask for.
+#
+# Most of an org doesn't change from one day to the next, so an archive can also be saved
+# as a delta against an earlier one (its base), usually yesterday's. A delta only stores the
+# members and boards that are new or changed plus which runs of the base's rows it reuses,
+# and the positions of the base's memberships that are gone plus the memberships that are
+# new. Reading a delta needs its base next to it, unchanged (the base's path, relative to
+# the delta, and its checksum are in the header), and the base's base, and so on; after
+# MAX_CHAIN deltas in a row write_archive() saves a full archive again.
+#
+# For an org with 50k members, 20k boards and 2M board memberships, a full archive is
+# about 5.2 MB and loads in about 1.6 s, most of which is building 2M Python lists; reading
+# just the members' columns takes about 10 ms. A day with a few hundred members and a few
+# thousand memberships changing is a delta of about 17 KB, which loads in about 2 s (2.5 s
+# at the end of a 30-day chain). A year of dailies comes to about 70 MB, or about 11 MB if
+# you pass a max_chain of 365 and don't mind slower loads late in the chain. Save them with
+#
+#   python -m trello audit --org <orgname> --save monday.trsnap
+#   python -m trello audit --org <orgname> --save tuesday.trsnap --base monday.trsnap
+#
+# `trello diff` reads them like any other snapshot. A delta gives its memberships back as the
+# base's remaining rows followed by the new ones, rather than in the order they were saved.
+
+import array
+import binascii
+import gc
+import json
+import os
+import struct
+import sys
+import zlib
+from bisect import bisect_right
+from collections import Counter
+from contextlib import contextmanager
+from itertools import chain, repeat
+
+try:
+  from itertools import accumulate
+except ImportError:
+  # Python 2
+  def accumulate(values):
+    total = 0
+    for v in values:
+      total += v
+      yield total
+
+ARCHIVE_EXTENSION = ".trsnap"
+MAGIC = b"TRSNAP1\n"
+
+TABLES = ("members", "boards", "memberships")
+
+# memberships refer to rows of these tables instead of storing the ids again
+REFERENCES = {
+  ("memberships", "idMember"): "members",
+  ("memberships", "idBoard"): "boards",
+}
+
+# memberships are stored sorted by these columns; the first is run-length encoded and the
+# second is stored as gaps within each run
+MEMBERSHIP_ORDER = ("idBoard", "idMember")
+
+# reading a delta means reading every archive under it, so after this many deltas in a row
+# write_archive() saves a full archive instead
+MAX_CHAIN = 30
+
+def is_archive(path):
+  with open(path, "rb") as f:
+    return f.read(len(MAGIC)) == MAGIC
+
+@contextmanager
+def _gc_paused():
+  # Python's cycle collector keeps re-scanning everything once millions of new lists and
+  # tuples pile up, which made loading 2M memberships three times slower. None of them can
+  # be part of a cycle, so hold it off until we're done
+  was_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    yield
+  finally:
+    if was_enabled:
+      gc.enable()
+
+def _crc32(path):
+  with open(path, "rb") as f:
+    return zlib.crc32(f.read()) & 0xffffffff
+
+### writing ##############################################################
+
+# _BYTE_OF[(True, False, ...)] is the byte with those 8 bits set, lowest bit first
+_BYTE_BITS = [tuple(bool(b >> i & 1) for i in range(8)) for b in range(256)]
+_BYTE_OF = dict((bits, b) for b, bits in enumerate(_BYTE_BITS))
+
+def _pack_bits(bits):
+  bits = list(bits)
+  bits.extend([False] * (-len(bits) % 8))
+  return bytes(bytearray(_BYTE_OF[tuple(bits[i:i + 8])] for i in range(0, len(bits), 8)))
+
+def _pack_ints(values):
+  largest = max(values) if values else 0
+  for typecode in "BHI":
+    if largest < 1 << (8 * array.array(typecode).itemsize):
+      break
+  ints = array.array(typecode, values)
+  if sys.byteorder == "big":
+    ints.byteswap()
+  return typecode, ints.tostring() if sys.version_info[0] < 3 else ints.tobytes()
+
+def _runs(values):
+  # [5, 5, 5, 7] -> ([5, 7], [3, 1])
+  run_values = []
+  run_lengths = []
+  for v in values:
+    if run_values and run_values[-1] == v:
+      run_lengths[-1] += 1
+    else:
+      run_values.append(v)
+      run_lengths.append(1)
+  return run_values, run_lengths
+
+_HEX_DIGITS = frozenset(u"0123456789abcdef")
+_STRING_TYPES = (type(u""), str)
+
+def _is_hex_ids(values):
+  # true if every value is a lowercase hex string of the same even length, like Trello ids.
+  # Check the characters ourselves: bytearray.fromhex() skips whitespace, so '0b ' would
+  # quietly come back as '0b'
+  if not values or not isinstance(values[0], _STRING_TYPES):
+    return False
+  width = len(values[0])
+  if width == 0 or width % 2:
+    return False
+  for v in values:
+    if not isinstance(v, _STRING_TYPES) or len(v) != width or not _HEX_DIGITS.issuperset(v):
+      return False
+  return True
+
+def _encode_refs(name, refs, run_refs):
+  # `refs` are the row numbers for the membership column `name`, and `run_refs` the ones for
+  # the column they're sorted by first
+  if name == MEMBERSHIP_ORDER[0]:
+    run_values, run_lengths = _runs(refs)
+    value_typecode, value_data = _pack_ints(run_values)
+    length_typecode, length_data = _pack_ints(run_lengths)
+    return {"encoding": "runs", "widths": [value_typecode, length_typecode]}, [value_data, length_data]
+
+  if name == MEMBERSHIP_ORDER[1]:
+    deltas = []
+    previous_run = previous = None
+    for ref, run_ref in zip(refs, run_refs):
+      if run_ref != previous_run:
+        previous_run = run_ref
+        previous = 0
+      deltas.append(ref - previous)
+      previous = ref
+    typecode, data = _pack_ints(deltas)
+    return {"encoding": "deltas", "within": MEMBERSHIP_ORDER[0], "width": typecode}, [data]
+
+  typecode, data = _pack_ints(refs)
+  return {"width": typecode}, [data]
+
+def _encode_column(table, name, values, refs):
+  # returns (column description for the header, list of raw blocks)
+  if (table, name) in REFERENCES:
+    column, blocks = _encode_refs(name, refs[name], refs.get(MEMBERSHIP_ORDER[0]))
+    column.update({"type": "ref", "table": REFERENCES[(table, name)]})
+    return column, blocks
+
+  if all(v is None or v is True or v is False for v in values):
+    blocks = [_pack_bits(v is True for v in values)]
+    column = {"type": "bool", "nullable": any(v is None for v in values)}
+    if column["nullable"]:
+      blocks.append(_pack_bits(v is None for v in values))
+    return column, blocks
+
+  if name == "id" and _is_hex_ids(values):
+    return {"type": "hex", "width": len(values[0]) // 2}, [bytes(bytearray.fromhex(u"".join(values)))]
+
+  # key on the type too: True == 1 and hashes the same, but they must come back as written
+  dictionary = []
+  codes = {}
+  for v in values:
+    key = (type(v), v)
+    if key not in codes:
+      codes[key] = len(dictionary)
+      dictionary.append(v)
+  typecode, data = _pack_ints([codes[(type(v), v)] for v in values])
+  return {"type": "dict", "width": typecode}, [json.dumps(dictionary, separators=(",", ":")).encode("utf-8"), data]
+
+def _membership_refs(fields, rows, row_numbers):
+  refs = {}
+  for name in MEMBERSHIP_ORDER:
+    i = fields.index(name)
+    numbers = row_numbers[REFERENCES[("memberships", name)]]
+    refs[name] = [numbers[row[i]] for row in rows]
+  return refs
+
+def _sort_memberships(fields, rows, row_numbers):
+  refs = _membership_refs(fields, rows, row_numbers)
+  n_members = len(row_numbers["members"])
+  keys = [board * n_members + member for board, member in zip(refs["idBoard"], refs["idMember"])]
+  return [rows[i] for i in sorted(range(len(rows)), key=keys.__getitem__)]
+
+def _reuse_delta(rows, base_rows):
+  # members and boards: the rows as runs that are either copied from the base or new.
+  # Returned flattened as [base row + 1, length] for a copied run and [0, length] for new rows
+  base_index = dict((tuple(row), i) for i, row in enumerate(base_rows))
+  runs = []
+  stored = []
+  for row in rows:
+    i = base_index.get(tuple(row))
+    source = 0 if i is None else i + 1
+    if source == 0:
+      stored.append(row)
+    if runs and ((source == 0 and runs[-2] == 0) or (source and runs[-2] and runs[-2] + runs[-1] == source)):
+      runs[-1] += 1
+    else:
+      runs.extend([source, 1])
+  typecode, data = _pack_ints(runs)
+  return stored, {"kind": "reuse", "width": typecode}, [data]
+
+def _remove_delta(rows, base_rows):
+  # memberships: the positions of the base's rows that are gone, and the rows that are new.
+  # Count rows rather than just checking for them, so a row that's in there twice stays twice
+  unmatched = Counter(map(tuple, rows))
+  removed = []
+  for position, row in enumerate(map(tuple, base_rows)):
+    if unmatched[row] > 0:
+      unmatched[row] -= 1
+    else:
+      removed.append(position)
+  stored = []
+  for row in rows:
+    key = tuple(row)
+    if unmatched[key] > 0:
+      unmatched[key] -= 1
+      stored.append(row)
+  # as gaps from the previous position, which stay small
+  typecode, data = _pack_ints([b - a for a, b in zip([0] + removed, removed)])
+  return stored, {"kind": "remove", "width": typecode}, [data]
+
+# Save `snapshot` to `path`. With `base`, the path of an earlier archive of the same org
+# (usually yesterday's), only what changed since it is saved, unless that would make a
+# chain of more than `max_chain` deltas.
+def write_archive(snapshot, path, base=None, level=9, max_chain=MAX_CHAIN):
+  with _gc_paused():
+    _write_archive(snapshot, path, base, level, max_chain)
+
+def _write_archive(snapshot, path, base, level, max_chain):
+  row_numbers = {}
+  for table in ("members", "boards"):
+    row_numbers[table] = dict((row[0], i) for i, row in enumerate(snapshot[table]["rows"]))
+
+  header = {"org": snapshot.get("org"), "tables": {}}
+  base_snapshot = None
+  if base is not None:
+    with open(base, "rb") as f:
+      chain_length = _read_header(f).get("chain", 0) + 1
+    # past max_chain deltas in a row, start over with a full archive so reading stays quick
+    if chain_length <= max_chain:
+      base_snapshot = read_archive(base)
+      header["base"] = {
+        "path": os.path.relpath(base, os.path.dirname(os.path.abspath(path))),
+        "crc32": _crc32(base),
+      }
+      header["chain"] = chain_length
+
+  blocks = []
+  offsets = [0]
+  def add_blocks(description, raw_blocks):
+    description["blocks"] = []
+    for raw in raw_blocks:
+      block = zlib.compress(raw, level)
+      description["blocks"].append([offsets[0], len(block)])
+      blocks.append(block)
+      offsets[0] += len(block)
+
+  for table in TABLES:
+    fields = snapshot[table]["fields"]
+    rows = snapshot[table]["rows"]
+    if table == "memberships":
+      rows = _sort_memberships(fields, rows, row_numbers)
+    info = {"rows": len(rows)}
+
+    if base_snapshot is not None:
+      if base_snapshot[table]["fields"] != fields:
+        raise ValueError("%s has different %s fields" % (base, table))
+      make_delta = _remove_delta if table == "memberships" else _reuse_delta
+      rows, info["delta"], raw_blocks = make_delta(rows, base_snapshot[table]["rows"])
+      info["delta"]["stored_rows"] = len(rows)
+      add_blocks(info["delta"], raw_blocks)
+
+    refs = _membership_refs(fields, rows, row_numbers) if table == "memberships" else {}
+    info["columns"] = []
+    for i, name in enumerate(fields):
+      column, raw_blocks = _encode_column(table, name, [row[i] for row in rows], refs)
+      column["name"] = name
+      add_blocks(column, raw_blocks)
+      info["columns"].append(column)
+    header["tables"][table] = info
+
+  header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+  # write next to the destination, get it onto disk, then swap it in, so a crash never leaves
+  # an empty or half-written archive behind
+  tmp_path = path + ".tmp"
+  with open(tmp_path, "wb") as f:
+    f.write(MAGIC)
+    f.write(struct.pack("<I", len(header_bytes)))
+    f.write(header_bytes)
+    for block in blocks:
+      f.write(block)
+    f.flush()
+    os.fsync(f.fileno())
+  _replace(tmp_path, path)
+
+def _replace(src, dst):
+  if hasattr(os, "replace"):
+    os.replace(src, dst)
+    return
+  # Python 2 has no os.replace, and os.rename won't overwrite an existing file on Windows
+  if os.name == "nt" and os.path.exists(dst):
+    os.remove(dst)
+  os.rename(src, dst)
+
+### reading ##############################################################
+
+# Everything below turns blocks back into lists with map(), chain() and friends rather than
+# a Python loop per row: a membership column has millions of rows.
+
+def _unpack_bits(data, n):
+  bits = list(chain.from_iterable(map(_BYTE_BITS.__getitem__, bytearray(data))))
+  del bits[n:]
+  return bits
+
+def _unpack_ints(typecode, data):
+  ints = array.array(typecode)
+  if sys.version_info[0] < 3:
+    ints.fromstring(data)
+  else:
+    ints.frombytes(data)
+  if sys.byteorder == "big":
+    ints.byteswap()
+  return ints
+
+def _read_header(f):
+  if f.read(len(MAGIC)) != MAGIC:
+    raise ValueError("not a snapshot archive")
+  header_length, = struct.unpack("<I", f.read(4))
+  return json.loads(f.read(header_length).decode("utf-8"))
+
+class _Pieces(object):
+  # A table's rows as runs of rows stored in one archive of a delta chain or another:
+  # (reader, start, stop) means rows start..stop of what that archive itself stores.
+  def __init__(self):
+    self.pieces = []
+    self.starts = []
+    self.rows = 0
+
+  def add(self, reader, start, stop):
+    if start == stop:
+      return
+    if self.pieces:
+      last_reader, last_start, last_stop = self.pieces[-1]
+      if last_reader is reader and last_stop == start:
+        self.pieces[-1] = (reader, last_start, stop)
+        self.rows += stop - start
+        return
+    self.pieces.append((reader, start, stop))
+    self.starts.append(self.rows)
+    self.rows += stop - start
+
+  # add rows start..stop of `other`
+  def add_slice(self, other, start, stop):
+    if start >= stop:
+      return
+    first = bisect_right(other.starts, start) - 1
+    last = bisect_right(other.starts, stop - 1) - 1
+    reader, piece_start, piece_stop = other.pieces[first]
+    offset = start - other.starts[first]
+    if first == last:
+      self.add(reader, piece_start + offset, piece_start + stop - other.starts[first])
+      return
+    self.add(reader, piece_start + offset, piece_stop)
+    # the pieces in between are copied whole, without looking at each one
+    if last > first + 1:
+      shift = self.rows - other.starts[first + 1]
+      self.pieces.extend(other.pieces[first + 1:last])
+      self.starts.extend([s + shift for s in other.starts[first + 1:last]])
+      self.rows = other.starts[last] + shift
+    reader, piece_start, _ = other.pieces[last]
+    self.add(reader, piece_start, piece_start + stop - other.starts[last])
+
+class _Reader(object):
+  def __init__(self, path):
+    self.f = open(path, "rb")
+    self.base = None
+    self.cache = {}
+    self.stored = {}
+    self.pieces = {}
+    try:
+      self.header = _read_header(self.f)
+      self.data_start = self.f.tell()
+      base = self.header.get("base")
+      if base is not None:
+        base_path = os.path.join(os.path.dirname(os.path.abspath(path)), base["path"])
+        if _crc32(base_path) != base["crc32"]:
+          raise ValueError("%s has changed since %s was saved against it" % (base_path, path))
+        self.base = _Reader(base_path)
+    except Exception:
+      self.close()
+      raise
+
+  def close(self):
+    self.f.close()
+    if self.base is not None:
+      self.base.close()
+
+  def _block(self, description, i):
+    offset, length = description["blocks"][i]
+    self.f.seek(self.data_start + offset)
+    return zlib.decompress(self.f.read(length))
+
+  def _column_info(self, table, name):
+    matches = [c for c in self.header["tables"][table]["columns"] if c["name"] == name]
+    if not matches:
+      raise KeyError("snapshot archive has no column %s.%s" % (table, name))
+    return matches[0]
+
+  def _run_lengths(self, table, name):
+    column = self._column_info(table, name)
+    return _unpack_ints(column["widths"][1], self._block(column, 1))
+
+  def _refs(self, table, column):
+    ids = self.column(column["table"], "id")
+    encoding = column.get("encoding")
+    if encoding == "runs":
+      run_values = _unpack_ints(column["widths"][0], self._block(column, 0))
+      run_lengths = self._run_lengths(table, column["name"])
+      return list(chain.from_iterable(map(repeat, map(ids.__getitem__, run_values), run_lengths)))
+
+    rows = _unpack_ints(column["width"], self._block(column, 0))
+    if encoding == "deltas":
+      deltas = rows
+      rows = []
+      start = 0
+      for length in self._run_lengths(table, column["within"]):
+        rows.extend(accumulate(deltas[start:start + length]))
+        start += length
+    return list(map(ids.__getitem__, rows))
+
+  # the rows of a column that are stored in this archive itself
+  def _stored_column(self, table, name):
+    if (table, name) in self.stored:
+      return self.stored[(table, name)]
+
+    info = self.header["tables"][table]
+    n = info["delta"]["stored_rows"] if "delta" in info else info["rows"]
+    column = self._column_info(table, name)
+    if column["type"] == "ref":
+      values = self._refs(table, column)
+    elif column["type"] == "bool":
+      values = _unpack_bits(self._block(column, 0), n)
+      if column["nullable"]:
+        nulls = _unpack_bits(self._block(column, 1), n)
+        values = [None if is_null else v for v, is_null in zip(values, nulls)]
+    elif column["type"] == "hex":
+      hex_ids = binascii.hexlify(self._block(column, 0)).decode("ascii")
+      width = 2 * column["width"]
+      values = [hex_ids[i:i + width] for i in range(0, len(hex_ids), width)]
+    else:
+      dictionary = json.loads(self._block(column, 0).decode("utf-8"))
+      values = list(map(dictionary.__getitem__, _unpack_ints(column["width"], self._block(column, 1))))
+
+    self.stored[(table, name)] = values
+    return values
+
+  def _delta_ints(self, delta):
+    return _unpack_ints(delta["width"], self._block(delta, 0))
+
+  # memberships, as pieces of what each archive in the chain stores
+  def _table_pieces(self, table):
+    if table in self.pieces:
+      return self.pieces[table]
+
+    info = self.header["tables"][table]
+    pieces = _Pieces()
+    if "delta" not in info:
+      pieces.add(self, 0, info["rows"])
+    else:
+      base_pieces = self.base._table_pieces(table)
+      start = 0
+      for position in accumulate(self._delta_ints(info["delta"])):
+        pieces.add_slice(base_pieces, start, position)
+        start = position + 1
+      pieces.add_slice(base_pieces, start, base_pieces.rows)
+      pieces.add(self, 0, info["delta"]["stored_rows"])
+
+    self.pieces[table] = pieces
+    return pieces
+
+  def column(self, table, name):
+    if (table, name) in self.cache:
+      return self.cache[(table, name)]
+
+    self._column_info(table, name)
+    delta = self.header["tables"][table].get("delta")
+    if delta is None:
+      values = self._stored_column(table, name)
+    elif delta["kind"] == "reuse":
+      # members and boards are small enough to copy from the base's column at each step
+      base_values = self.base.column(table, name)
+      if name != "id":
+        # don't keep a copy for every step of a chain; ids stay for the base's ref columns
+        self.base.cache.pop((table, name), None)
+      stored = self._stored_column(table, name)
+      ints = self._delta_ints(delta)
+      values = []
+      start = 0
+      for source, length in zip(ints[::2], ints[1::2]):
+        if source:
+          values.extend(base_values[source - 1:source - 1 + length])
+        else:
+          values.extend(stored[start:start + length])
+          start += length
+    else:
+      # memberships are too big for that, so work out where each row comes from first and
+      # copy each column just once
+      values = []
+      readers = set()
+      for reader, start, stop in self._table_pieces(table).pieces:
+        values.extend(reader._stored_column(table, name)[start:stop])
+        readers.add(reader)
+      for reader in readers:
+        reader.stored.pop((table, name), None)
+
+    self.cache[(table, name)] = values
+    return values
+
+# Load only some columns, e.g.
+#
+#   read_columns("today.trsnap", {"members": ["username", "org_deactivated"]})
+#
+# returns {"members": {"username": [...], "org_deactivated": [...]}}. Pass None for a table's
+# column list to get all of its columns.
+def read_columns(path, columns):
+  reader = _Reader(path)
+  try:
+    with _gc_paused():
+      result = {}
+      for table, names in columns.items():
+        if names is None:
+          names = [c["name"] for c in reader.header["tables"][table]["columns"]]
+        result[table] = dict((name, reader.column(table, name)) for name in names)
+      return result
+  finally:
+    reader.close()
+
+# Load the whole archive back into the same shape build_snapshot() returns.
+def read_archive(path):
+  reader = _Reader(path)
+  try:
+    with _gc_paused():
+      snapshot = {"org": reader.header.get("org")}
+      for table, info in reader.header["tables"].items():
+        fields = [c["name"] for c in info["columns"]]
+        columns = [reader.column(table, name) for name in fields]
+        snapshot[table] = {"fields": fields, "rows": list(map(list, zip(*columns))) if columns else []}
+      return snapshot
+  finally:
+    reader.close()
@@ -0,0 +1,75 @@
+### Exporting a backup for a Business Class organization via the Trello API ###########
+#
+# This uses an undocumented feature of the Trello API to automate backing up your
+# organization's data. It used to live in demo_bc_org_backup.py. Run it with:
+#
+#   python -m trello backup --id_organization <orgname>
+#
+# NOTE: You'll need to make sure you get a read,write token for the API Export. Because the
+#       Business Class export writes a copy of the backup to your organization, you need
+#       write permissions and not just read permissions.
+
+from __future__ import print_function
+
+import time
+
+from trello.helper import query_trello
+from trello.profiling import span
+
+### Request a backup and get a token ###################################
+def request_export(id_organization, download_attachments, attachment_age):
+  url = 'organizations/%s/exports' % id_organization
+  args = {'attachments': str(download_attachments).lower(), 'attachment_age': attachment_age}
+  resp = query_trello('POST', url, args)
+
+  if resp.status_code != 200:
+    print('We did not get a token back. There may be a problem with id_organization or maybe you have not upgraded to Business Class. Also, make sure you requested a token with scope=read,write.')
+    resp.raise_for_status()
+    return None
+
+  with span("decode"):
+    return resp.json()['id']
+
+#Now that we have an export token, we'll periodically check to see if it's available
+def wait_for_export(id_organization, id_export, poll_interval):
+  while True:
+    url = 'organizations/%s/exports/%s' % (id_organization, id_export)
+    # memo=False: the whole point is to see the status change between polls
+    resp = query_trello('GET', url, memo=False)
+    with span("decode"):
+      response_dict = resp.json()
+    #we should eventually get back a URL in 'complete'
+    if response_dict['status']['stage'] == 'Export complete':
+      return 'organizations/%s/exports/%s/download' % (id_organization, id_export)
+
+    has_progress = 'progress' in response_dict['status'] and 'total' in response_dict['status']
+
+    if has_progress:
+      print('%s: %s of %s' % (response_dict['status']['stage'], response_dict['status']['progress'], response_dict['status']['total']))
+    else:
+      print(response_dict['status']['stage'])
+
+    time.sleep(poll_interval)
+
+#now we're going to make a request for the actual downloaded file and write it to out_file
+def download_export(download_url, out_file):
+  resp = query_trello('GET', download_url, stream=True)
+  if not resp.ok:
+    print('something went wrong')
+    resp.raise_for_status()
+
+  with open(out_file, 'wb') as f:
+    for chunk in resp.iter_content(chunk_size=1024):
+      if chunk:
+        f.write(chunk)
+        f.flush()
+
+def main(args):
+  id_export = request_export(args.id_organization, args.download_attachments, args.attachment_age)
+  if not id_export:
+    return 1
+
+  download_url = wait_for_export(args.id_organization, id_export, args.poll_interval)
+  download_export(download_url, args.out_file)
+
+  print('organization export downloaded to %s' % args.out_file)
@@ -0,0 +1,74 @@
+# A checkpoint journal for the audit crawl, so a crawl that dies part way through can
+# pick up where it left off with `python -m trello audit --org <orgname> --resume`.
+#
+# The journal is a file of JSON lines. The first line names the org; after that there's one
+# line per board whose memberships we've fetched. Each line goes to the file in a single
+# append and is fsync'd, so after a crash the journal holds every finished board plus at
+# most one half-written line at the end, which load_checkpoint() ignores and trims off. A
+# journal that doesn't even have its header line yet counts as nothing done.
+# The journal is removed once the crawl finishes.
+
+import json
+import os
+
+def default_checkpoint_path(id_org):
+  return "%s.audit-checkpoint" % id_org
+
+class CheckpointError(Exception):
+  pass
+
+# returns the boards already fetched, or None if the journal is empty or its header never made
+# it to disk, in which case the crawl should start over
+def load_checkpoint(path, id_org):
+  board_memberships_by_board = {}
+  good_length = 0
+  with open(path, "rb") as f:
+    for i, line in enumerate(f):
+      if not line.endswith(b"\n"):
+        break
+      try:
+        record = json.loads(line.decode("utf-8"))
+      except ValueError:
+        break
+      if i == 0:
+        if "org" not in record:
+          raise CheckpointError("%s is not a checkpoint journal" % path)
+        if record["org"] != id_org:
+          raise CheckpointError("%s is a checkpoint for org %s, not %s" % (path, record["org"], id_org))
+      else:
+        board_memberships_by_board[record["board"]] = record["memberships"]
+      good_length += len(line)
+
+  if good_length == 0:
+    return None
+
+  # drop a half-written last line so new records start on a fresh line
+  if good_length != os.path.getsize(path):
+    with open(path, "r+b") as f:
+      f.truncate(good_length)
+
+  return board_memberships_by_board
+
+class CheckpointJournal(object):
+  def __init__(self, path, id_org, resume=False):
+    self.path = path
+    flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+    if not resume:
+      flags |= os.O_TRUNC
+    self.fd = os.open(path, flags, 0o600)
+    if not resume:
+      self._append({"org": id_org})
+
+  def _append(self, record):
+    os.write(self.fd, (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+    os.fsync(self.fd)
+
+  def board_done(self, id_board, board_memberships):
+    self._append({"board": id_board, "memberships": board_memberships})
+
+  def close(self):
+    os.close(self.fd)
+
+  def finish(self):
+    self.close()
+    os.remove(self.path)
@@ -0,0 +1,103 @@
+# The `trello` command line tool. Run it with `python -m trello <command> --help`.
+#
+# Only argparse is imported up front. The module behind each command (and with it
+# `requests`, `texttable` and your settings.py) is imported after the arguments are
+# parsed, so `--help` and typos come back right away.
+
+import argparse
+import importlib
+
+COMMAND_MODULES = {
+  'audit': 'trello.audit',
+  'backup': 'trello.backup',
+  'offboard': 'trello.offboard',
+  'lockdown': 'trello.lockdown',
+  'diff': 'trello.diff',
+}
+
+def add_audit_arguments(parser):
+  parser.add_argument("--org", help="the id of the organization or the orgname", required=True)
+  parser.add_argument("--summary", help="print only the summary of users", action="store_true")
+  parser.add_argument("--all", help="print the summary and board details for all users", action="store_true")
+  parser.add_argument("--user", help="print only the board details for a particular user")
+  parser.add_argument("--resume", help="skip boards already fetched by a crawl that didn't finish", action="store_true")
+  parser.add_argument("--checkpoint", help="where to keep the crawl's checkpoint journal (default: <org>.audit-checkpoint)")
+  parser.add_argument("--save", help="also save a snapshot of the crawl to this path, for use with `trello diff` (.gz to compress)")
+  parser.add_argument("--base", help="with --save to a .trsnap archive, only save what changed since this earlier archive")
+
+def add_backup_arguments(parser):
+  parser.add_argument('--id_organization', dest='id_organization', required=True,
+                     default=None,
+                     help='the id of the organization. The orgname will also work, but NB the orgname can change and id cannot.')
+  parser.add_argument('--download_attachments', dest='download_attachments',
+                     action='store_true', default=False,
+                     help='decide if you want to download attachments. Default is false.')
+  parser.add_argument('--attachment_age', dest='attachment_age',
+                     type=int, default=0,
+                     help='should be a number between 0 and 3650 (default: 0); which attachments should be in the export. If 0, gets all of them; if anything else, gets only attachments uploaded the past `attachment_age` days.')
+  parser.add_argument('--poll_interval', dest='poll_interval',
+                     type=int, default=60,
+                     help='Time interval, in seconds, for often this script will check to see if the download is available. Please do not use less than 60 in production.')
+  parser.add_argument('--out_file', dest='out_file',
+                     default='export.zip',
+                     help='where to write the downloaded export (default: export.zip)')
+
+def add_offboard_arguments(parser):
+  parser.add_argument("--email", help="the email address of the member who left", required=True)
+  parser.add_argument("--execute", help="actually deactivate or remove the member instead of doing a dry run", action="store_true")
+
+def add_lockdown_arguments(parser):
+  parser.add_argument("--execute", help="actually disable external members and remove them from boards instead of doing a dry run", action="store_true")
+
+def add_diff_arguments(parser):
+  parser.add_argument("old", help="the older snapshot saved with `trello audit --save`")
+  parser.add_argument("new", help="the newer snapshot saved with `trello audit --save`")
+  parser.add_argument("--json", help="print each change as a line of JSON", action="store_true")
+
+def add_profile_arguments(parser):
+  parser.add_argument("--profile", help="time each stage of the run and write a collapsed-stack file for flame graphs", action="store_true")
+  parser.add_argument("--profile-out", dest="profile_out", help="where to write the collapsed stacks (default: trello-<command>.folded)")
+  parser.add_argument("--profile-cprofile", dest="profile_cprofile", help="also run cProfile and save its stats (implies --profile)", action="store_true")
+  parser.add_argument("--profile-memory", dest="profile_memory", help="also track memory allocated per stage with tracemalloc (implies --profile)", action="store_true")
+
+def build_parser():
+  profile_parser = argparse.ArgumentParser(add_help=False)
+  add_profile_arguments(profile_parser.add_argument_group("profiling"))
+
+  parser = argparse.ArgumentParser(prog="trello", description="Tools for auditing and managing Trello organizations.")
+  subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+  add_audit_arguments(subparsers.add_parser("audit", parents=[profile_parser],
+      help="find Trello members who have access to organization resources",
+      description="Find Trello members who have access to organization resources."))
+  add_backup_arguments(subparsers.add_parser("backup", parents=[profile_parser],
+      help="get a backup of your organization data (Business Class)",
+      description="Get a backup of your organization data in Trello. Requires Business Class."))
+  add_offboard_arguments(subparsers.add_parser("offboard", parents=[profile_parser],
+      help="deactivate or remove someone who left the company",
+      description="Deactivate or remove a member from the organizations you admin. Dry run unless --execute is given."))
+  add_lockdown_arguments(subparsers.add_parser("lockdown", parents=[profile_parser],
+      help="remove board members who are not in the organization",
+      description="Disable external members and remove board members who don't belong to the organization. Dry run unless --execute is given."))
+  add_diff_arguments(subparsers.add_parser("diff", parents=[profile_parser],
+      help="compare two audit snapshots",
+      description="Report members added or removed, board access gained or lost, member type changes and deactivations between two audit snapshots."))
+
+  return parser
+
+def main(argv=None):
+  parser = build_parser()
+  args = parser.parse_args(argv)
+  if not args.command:
+    parser.print_help()
+    return 2
+
+  from trello.helper import memo_scope
+  command = importlib.import_module(COMMAND_MODULES[args.command])
+  with memo_scope():
+    if args.profile or args.profile_cprofile or args.profile_memory:
+      from trello.profiling import profiled
+      out_path = args.profile_out or "trello-%s.folded" % args.command
+      with profiled(args.command, out_path, args.profile_cprofile, args.profile_memory):
+        return command.main(args)
+    return command.main(args)
@@ -0,0 +1,110 @@
+# Compare two saved audit snapshots (see trello/snapshot.py) and report what changed.
+#
+#   python -m trello diff last_week.json today.json [--json]
+#
+# Each snapshot is indexed once by member id and by (member id, board id), and the other
+# snapshot is walked against those indexes, so a diff takes linear time even on very large
+# orgs. Changes are yielded one at a time by diff_snapshots() and printed as soon as they're
+# found instead of being collected first.
+
+from __future__ import print_function
+
+import json
+import sys
+
+from trello.profiling import span
+from trello.snapshot import load_snapshot, iter_rows
+
+def index_members(snapshot):
+  return dict((m["id"], m) for m in iter_rows(snapshot, "members"))
+
+def index_boards(snapshot):
+  return dict((b["id"], b) for b in iter_rows(snapshot, "boards"))
+
+def index_memberships(snapshot):
+  return dict(((m["idMember"], m["idBoard"]), m) for m in iter_rows(snapshot, "memberships"))
+
+def _change(change, member, **kwargs):
+  kwargs["change"] = change
+  kwargs["id_member"] = member["id"]
+  kwargs["username"] = member["username"]
+  return kwargs
+
+def diff_members(old_members, new_members):
+  for id_member, new in new_members.items():
+    old = old_members.get(id_member)
+    if old is None:
+      yield _change("member_added", new, org_member=new["org_member"], org_member_type=new["org_member_type"])
+      continue
+
+    if old["org_member"] != new["org_member"]:
+      yield _change("org_joined" if new["org_member"] else "org_left", new)
+    if old["org_member_type"] != new["org_member_type"]:
+      yield _change("member_type_changed", new, old=old["org_member_type"], new=new["org_member_type"])
+    if old["org_deactivated"] != new["org_deactivated"]:
+      yield _change("member_deactivated" if new["org_deactivated"] else "member_reactivated", new)
+
+  for id_member, old in old_members.items():
+    if id_member not in new_members:
+      yield _change("member_removed", old, org_member=old["org_member"], org_member_type=old["org_member_type"])
+
+def diff_memberships(old_memberships, new_memberships, members, boards):
+  def board_change(change, key, **kwargs):
+    id_member, id_board = key
+    board = boards.get(id_board, {})
+    return _change(change, members[id_member], id_board=id_board, board=board.get("name"), **kwargs)
+
+  for key, new in new_memberships.items():
+    old = old_memberships.get(key)
+    if old is None:
+      yield board_change("board_access_gained", key, board_member_type=new["memberType"])
+      continue
+
+    if old["memberType"] != new["memberType"]:
+      yield board_change("board_member_type_changed", key, old=old["memberType"], new=new["memberType"])
+    if old["deactivated"] != new["deactivated"]:
+      yield board_change("board_deactivated" if new["deactivated"] else "board_reactivated", key)
+
+  for key, old in old_memberships.items():
+    if key not in new_memberships:
+      yield board_change("board_access_lost", key, board_member_type=old["memberType"])
+
+def diff_snapshots(old_snapshot, new_snapshot):
+  old_members = index_members(old_snapshot)
+  new_members = index_members(new_snapshot)
+  for change in diff_members(old_members, new_members):
+    yield change
+
+  # look up names in the new snapshot first, falling back to the old one for things that were removed
+  members = dict(old_members)
+  members.update(new_members)
+  boards = index_boards(old_snapshot)
+  boards.update(index_boards(new_snapshot))
+  for change in diff_memberships(index_memberships(old_snapshot), index_memberships(new_snapshot), members, boards):
+    yield change
+
+def format_change(change):
+  details = ", ".join("%s=%s" % (k, change[k]) for k in sorted(change) if k not in ("change", "id_member", "username"))
+  line = "%s: %s (%s)" % (change["change"], change["username"], change["id_member"])
+  if details:
+    line += " " + details
+  return line
+
+def main(args):
+  with span("decode"):
+    old_snapshot = load_snapshot(args.old)
+    new_snapshot = load_snapshot(args.new)
+
+  # changes are printed as they're found, so comparing and printing share one span
+  changed = False
+  with span("diff"):
+    for change in diff_snapshots(old_snapshot, new_snapshot):
+      changed = True
+      if args.json:
+        print(json.dumps(change, sort_keys=True))
+      else:
+        print(format_change(change))
+      sys.stdout.flush()
+
+  if not changed and not args.json:
+    print("No changes.")
@@ -0,0 +1,132 @@
+# Small helpers for talking to the Trello API.
+#
+# `requests` and your settings.py are only imported the first time you actually make a
+# request, so importing this module (or anything that uses it) stays cheap.
+#
+# Scripts tend to ask for the same thing more than once in a run (e.g. the same board's
+# members from two different helpers). Inside a `with memo_scope():` block,
+# identical GETs share one request: the first caller makes it, anyone asking for the same
+# thing at the same time waits for that result, and later callers get it straight from the
+# memo. Any PUT, POST or DELETE drops what's memoized for the object it touches (everything
+# under boards/<id> for a write to boards/<id>/members/<id>, for example), and you can call
+# invalidate() yourself. Pass memo=False for reads whose answer is expected to change, like
+# polling for an export to finish. The `trello` command runs each command inside a memo
+# scope; outside of one, every call goes to the API like before.
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from trello.profiling import span
+
+BASE_URL = 'https://trello.com/1/'
+
+# the memo keeps the most recently used responses; a crawl fetches each board once, so
+# there's no point holding on to all of them
+MEMO_SIZE = 128
+
+_lock = threading.Lock()
+_memo = None
+
+class _Call(object):
+  def __init__(self):
+    self.done = threading.Event()
+    self.resp = None
+    self.error = None
+
+@contextmanager
+def memo_scope():
+  global _memo
+  with _lock:
+    previous, _memo = _memo, OrderedDict()
+  try:
+    yield
+  finally:
+    with _lock:
+      _memo = previous
+
+def _resource(url):
+  # 'boards/abc/members?filter=admins' -> ('board', 'abc'); Trello accepts both the
+  # singular and plural form of each object, so treat them the same
+  parts = url.split('?', 1)[0].strip('/').split('/')
+  return (parts[0].rstrip('s'), parts[1] if len(parts) > 1 else None)
+
+def invalidate(url=None):
+  with _lock:
+    if _memo is None:
+      return
+    if url is None:
+      _memo.clear()
+      return
+    resource = _resource(url)
+    for key in [k for k in _memo if _resource(k[0]) == resource]:
+      del _memo[key]
+
+def get_params_key_and_token():
+  from settings import trello_key, trello_token
+  return {'key':trello_key,'token':trello_token}
+
+def _send(method, url, data=None, stream=False):
+  from requests import Request, Session
+  url = BASE_URL + url
+  s = Session()
+  req = Request(method, url,
+      data=data,
+      params=get_params_key_and_token()
+  )
+
+  prepped = s.prepare_request(req)
+
+  with span("fetch"):
+    resp = s.send(prepped, stream=stream)
+
+  return resp
+
+def _get_single_flight(url, data):
+  key = (url, tuple(sorted(data.items())) if data else ())
+  with _lock:
+    memo = _memo
+    if memo is not None:
+      call = memo.pop(key, None)
+      owner = call is None
+      if owner:
+        call = _Call()
+      # (re)insert at the end so it's the last thing to be evicted
+      memo[key] = call
+
+  if memo is None:
+    # the scope ended since query_trello looked
+    return _send('GET', url, data)
+
+  if not owner:
+    call.done.wait()
+    if call.error is not None:
+      raise call.error
+    return call.resp
+
+  try:
+    call.resp = _send('GET', url, data)
+  except Exception as e:
+    call.error = e
+    raise
+  finally:
+    with _lock:
+      # only keep good responses around; errors and rate limits get retried by the next caller
+      if call.resp is None or not call.resp.ok:
+        if memo.get(key) is call:
+          del memo[key]
+      while len(memo) > MEMO_SIZE:
+        memo.popitem(last=False)
+    call.done.set()
+  return call.resp
+
+def query_trello(method, url, data=None, stream=False, memo=True):
+  if method == 'GET':
+    if memo and _memo is not None and not stream:
+      return _get_single_flight(url, data)
+    return _send(method, url, data, stream)
+
+  try:
+    return _send(method, url, data, stream)
+  finally:
+    invalidate(url)
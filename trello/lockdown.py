@@ -0,0 +1,95 @@
+### Organization lock down ##############################
+#
+# Let's say I want to lock down my organization so that only people who are a
+# member of the organization can be a member of boards.
+#
+# This used to live in demo_organization_management.py. Run it with:
+#
+#   python -m trello lockdown [--execute]
+
+from __future__ import print_function
+
+from trello.helper import query_trello
+from trello.profiling import span
+from trello.orgs import get_id_member_me, get_my_orgs, find_member, am_i_admin, am_i_super_admin, dry_run_prefix
+
+# This method will disable external members from joining boards
+def can_disable_external_members(org):
+  return 'disableExternalMembers' in org['premiumFeatures']
+
+# If you have Business Class, you can disable external members for your organization, which
+# you would want to do if you're locking everything down
+def disable_external_members(org, id_member_me, execute=False):
+  if not am_i_admin(org, id_member_me):
+    print('not an admin of org %s' % org['name'])
+    return
+
+  if not can_disable_external_members(org):
+    print('cannot disable external members for org %s' % org['name'])
+
+  if execute:
+    url = 'organizations/%s/prefs/externalMembersDisabled' % org['id']
+    query_trello('PUT', url, {'value': 'true'}) #not tested
+
+  print('%sdisabled external members for org %s' % (dry_run_prefix(execute), org['name']))
+
+def get_board_members(id_board):
+  url = 'boards/%s/members' % id_board
+  resp = query_trello('GET', url, {'fields': 'username'})
+  with span("decode"):
+    return resp.json()
+
+# We need a helper method to determine if we're an admin of the board.
+# This is only necessary if the org does not have Business Class
+def is_board_admin(id_board, id_member):
+  url = 'boards/%s/members' % id_board
+  resp = query_trello('GET', url, {'filter': 'admins', 'fields': 'username'})
+  with span("decode"):
+    admins = resp.json()
+  for member in admins:
+    if member['id'] == id_member:
+      return True
+  return False
+
+# we have to be an admin of either a Business Class org or the individual board. Removing
+# other members doesn't change that, so we check once per board rather than once per member
+def can_admin_board(id_board, org, id_member_me):
+  return am_i_super_admin(org, id_member_me) or is_board_admin(id_board, id_member_me)
+
+# this method will remove a member from the board
+def remove_member_from_board(id_board, id_member, execute = False):
+  if execute:
+    url = 'boards/%s/members/%s' % (id_board, id_member)
+    query_trello('DELETE', url, {'idMember': id_member}) #not tested
+
+  print('%sremoved member %s from board %s' % (dry_run_prefix(execute), id_member, id_board))
+
+# Now that we've defined our helper methods, lets iterate through the boards in each org and remove
+# members who don't belong to the organization
+def main(args):
+  id_member_me = get_id_member_me()
+
+  for org in get_my_orgs():
+    #make sure I'm an admin first
+    if not am_i_admin(org, id_member_me):
+      print('I am not an admin of org %s' % org['name'])
+      continue
+
+    # then let's disable external members
+    disable_external_members(org, id_member_me, execute = args.execute)
+
+    # now let's iterate through the list of boards, looking at the members to see if they belong to the org
+    for id_board in org['idBoards']:
+      external_members = [m for m in get_board_members(id_board) if not find_member(org, m['id'])]
+      if not external_members:
+        continue
+
+      if not can_admin_board(id_board, org, id_member_me):
+        print('not an admin of board %s' % id_board)
+        continue
+
+      for member in external_members:
+        remove_member_from_board(id_board, member['id'], execute = args.execute)
+
+# If you mainly wanted to use this for informational purposes, and not actually to remove people, you could
+# query the Trello API for more information about the boards and members so the output gave you more information.
@@ -0,0 +1,170 @@
+# Access analytics over a whole organization at once.
+#
+# The audit report keeps a list of members, each with a copy of every board they're on,
+# which is great for printing but slow for questions like "who is on boards but isn't in
+# the org?". MembershipMatrix keeps the same crawl as a sparse member x board matrix in
+# coordinate form: one (row, column, member type, readable) entry per board membership.
+# Questions about the whole org then become numpy operations over those arrays instead
+# of nested loops.
+#
+# numpy is only needed if you use this module (`pip install numpy`).
+#
+#   from trello.audit import crawl_org
+#   from trello.matrix import MembershipMatrix
+#
+#   matrix = MembershipMatrix.from_crawl(*crawl_org('myorg'))
+#   matrix.external_member_ids()
+#
+# or load saved snapshots (see trello/snapshot.py) to compare two runs:
+#
+#   from trello.snapshot import load_snapshot
+#
+#   old = MembershipMatrix.from_snapshot(load_snapshot('last_week.trsnap'))
+#   new = MembershipMatrix.from_snapshot(load_snapshot('today.trsnap'))
+#   gained = new.difference(old)
+
+# board member types are stored as small ints; 0 is anything we don't know about
+BOARD_MEMBER_TYPES = [None, 'normal', 'admin', 'observer']
+BOARD_MEMBER_TYPE_CODES = dict((t, code) for code, t in enumerate(BOARD_MEMBER_TYPES))
+ADMIN = BOARD_MEMBER_TYPE_CODES['admin']
+
+def _numpy():
+  import numpy
+  return numpy
+
+def _index(ids):
+  return dict((id_, i) for i, id_ in enumerate(ids))
+
+class MembershipMatrix(object):
+  def __init__(self, member_ids, board_ids, rows, cols, member_types, readable, org_member, org_deactivated):
+    np = _numpy()
+    self.member_ids = list(member_ids)
+    self.board_ids = list(board_ids)
+    self.member_index = _index(self.member_ids)
+    self.board_index = _index(self.board_ids)
+    # one entry per board membership
+    self.rows = np.asarray(rows, dtype=np.int64)
+    self.cols = np.asarray(cols, dtype=np.int64)
+    self.member_types = np.asarray(member_types, dtype=np.int8)
+    self.readable = np.asarray(readable, dtype=bool)
+    # one entry per member
+    self.org_member = np.asarray(org_member, dtype=bool)
+    self.org_deactivated = np.asarray(org_deactivated, dtype=bool)
+
+  # build the matrix from what trello.audit.crawl_org returns
+  @classmethod
+  def from_crawl(cls, org_memberships, org_boards, board_memberships_by_board):
+    member_ids = [m["idMember"] for m in org_memberships]
+    member_index = _index(member_ids)
+    org_member = [True] * len(member_ids)
+    org_deactivated = [bool(m["deactivated"]) for m in org_memberships]
+
+    board_ids = [b["id"] for b in org_boards]
+    rows, cols, member_types, readable = [], [], [], []
+    for col, id_board in enumerate(board_ids):
+      for board_membership in board_memberships_by_board.get(id_board, []):
+        id_member = board_membership["idMember"]
+        row = member_index.get(id_member)
+        if row is None:
+          # on a board, but not in the org
+          row = member_index[id_member] = len(member_ids)
+          member_ids.append(id_member)
+          org_member.append(False)
+          org_deactivated.append(False)
+        rows.append(row)
+        cols.append(col)
+        member_types.append(BOARD_MEMBER_TYPE_CODES.get(board_membership["memberType"], 0))
+        readable.append(not board_membership["unconfirmed"] and not board_membership["deactivated"])
+
+    return cls(member_ids, board_ids, rows, cols, member_types, readable, org_member, org_deactivated)
+
+  # build the matrix from a snapshot saved by `trello audit --save`
+  @classmethod
+  def from_snapshot(cls, snapshot):
+    members = snapshot["members"]
+    id_, org_member, org_deactivated = [members["fields"].index(f) for f in ("id", "org_member", "org_deactivated")]
+    member_ids = [row[id_] for row in members["rows"]]
+    member_index = _index(member_ids)
+
+    boards = snapshot["boards"]
+    board_ids = [row[boards["fields"].index("id")] for row in boards["rows"]]
+    board_index = _index(board_ids)
+
+    memberships = snapshot["memberships"]
+    id_member, id_board, member_type, unconfirmed, deactivated = [memberships["fields"].index(f)
+        for f in ("idMember", "idBoard", "memberType", "unconfirmed", "deactivated")]
+    rows = memberships["rows"]
+
+    return cls(member_ids, board_ids,
+               [member_index[row[id_member]] for row in rows],
+               [board_index[row[id_board]] for row in rows],
+               [BOARD_MEMBER_TYPE_CODES.get(row[member_type], 0) for row in rows],
+               [not row[unconfirmed] and not row[deactivated] for row in rows],
+               [bool(row[org_member]) for row in members["rows"]],
+               [bool(row[org_deactivated]) for row in members["rows"]])
+
+  @property
+  def shape(self):
+    return (len(self.member_ids), len(self.board_ids))
+
+  # number of boards each member is on, in member_ids order
+  def board_counts(self):
+    return _numpy().bincount(self.rows, minlength=len(self.member_ids))
+
+  # number of boards each member can actually see, in member_ids order
+  def readable_board_counts(self):
+    return _numpy().bincount(self.rows[self.readable], minlength=len(self.member_ids))
+
+  # members who are on at least one board but aren't members of the org
+  def external_member_ids(self):
+    np = _numpy()
+    external = (self.board_counts() > 0) & ~self.org_member
+    return [self.member_ids[i] for i in np.flatnonzero(external)]
+
+  # number of admins on each board who can actually see it (not deactivated or unconfirmed),
+  # in board_ids order
+  def admin_counts(self):
+    np = _numpy()
+    readable_admins = (self.member_types == ADMIN) & self.readable
+    return np.bincount(self.cols[readable_admins], minlength=len(self.board_ids))
+
+  # boards with no admin who can see them, including boards whose only admins are deactivated
+  def boards_without_admins(self):
+    np = _numpy()
+    return [self.board_ids[i] for i in np.flatnonzero(self.admin_counts() == 0)]
+
+  # (id_member, id_board) pairs that are in this matrix but not in `other`. Use it on two
+  # snapshots of the same org: new.difference(old) is board access that was gained and
+  # old.difference(new) is board access that was lost.
+  def difference(self, other):
+    np = _numpy()
+    member_ids, member_map, other_member_map = _align(self.member_ids, other.member_ids)
+    board_ids, board_map, other_board_map = _align(self.board_ids, other.board_ids)
+
+    n_boards = len(board_ids)
+    keys = member_map[self.rows] * n_boards + board_map[self.cols]
+    other_keys = other_member_map[other.rows] * n_boards + other_board_map[other.cols]
+    # sort both sides so the lookups walk memory in order; this is much faster than
+    # np.setdiff1d or np.isin on millions of memberships
+    keys = np.sort(keys)
+    other_keys = np.sort(other_keys)
+    positions = np.searchsorted(other_keys, keys)
+    found = np.zeros(len(keys), dtype=bool)
+    in_range = positions < len(other_keys)
+    found[in_range] = other_keys[positions[in_range]] == keys[in_range]
+    diff = keys[~found]
+    return [(member_ids[k // n_boards], board_ids[k % n_boards]) for k in diff.tolist()]
+
+def _align(ids, other_ids):
+  # give the ids from both snapshots one shared numbering, and return arrays that map each
+  # snapshot's own positions into it
+  np = _numpy()
+  index = _index(ids)
+  all_ids = list(ids)
+  for id_ in other_ids:
+    if id_ not in index:
+      index[id_] = len(all_ids)
+      all_ids.append(id_)
+  id_map = np.arange(len(ids), dtype=np.int64)
+  other_id_map = np.fromiter((index[id_] for id_ in other_ids), dtype=np.int64, count=len(other_ids))
+  return all_ids, id_map, other_id_map
@@ -0,0 +1,71 @@
+### Deactivate or remove someone who left the company ###########
+#
+# Let's say you have the email address of someone who left your organization
+# and you want to remove them from the organizations that you manage.
+#
+# NB: People who sign up for Trello can use any email address they choose, meaning
+#     they may or may not have used an official company email.
+#
+# This used to live in demo_organization_management.py. Run it with:
+#
+#   python -m trello offboard --email joe@example.com [--execute]
+
+from __future__ import print_function
+
+from trello.helper import query_trello
+from trello.profiling import span
+from trello.orgs import get_id_member_me, get_my_orgs, find_member, am_i_admin, dry_run_prefix
+
+# using https://trello.com/docs/api/search/index.html#get-1-search-members
+def find_id_member_by_email(email):
+  resp = query_trello('GET', 'search/members', {'query': email, 'limit': 1})
+  with span("decode"):
+    response_members = resp.json()
+
+  if response_members and 'id' in response_members[0]:
+    return response_members[0]['id']
+  return None
+
+# Let's make a method for determining if I can deactivate a user
+def can_deactivate(org):
+  return 'deactivated' in org['premiumFeatures']
+
+# And let's make a method to either deactivate or remove a member
+# NB: if your organization has Business Class, you can deactivate a member, which will
+#     remove access too all of the boards for that member, while still letting you see
+#     what they belonged to. Removing a member doesn't remove them from the boards to
+#     which they belonged.
+# We're going to throw in an execute parameter so we can do a dry run first
+
+def deactivate_or_remove(org, id_member, id_member_me, execute=False):
+  #gotta be an admin
+  if not am_i_admin(org, id_member_me):
+    print('not an admin of org %s' % org['name'])
+    return
+
+  if not find_member(org, id_member):
+    print('member %s does not belong to org %s' % (id_member, org['name']))
+
+  if can_deactivate(org):
+    if execute:
+      url = 'organizations/%s/members/%s/deactivated' % (org['id'], id_member)
+      # NB: for 'value' we need to provide a string, not a Python boolean
+      query_trello('PUT', url, {'id': id_member, 'value': 'true'})
+
+    print('%sdeactivated member %s from org %s' % (dry_run_prefix(execute), id_member, org['name']))
+  else:
+    if execute:
+      url = 'organizations/%s/members/%s' % (org['id'], id_member)
+      query_trello('DELETE', url, {'id': id_member})
+
+    print('%sremoved member %s from org %s' % (dry_run_prefix(execute), id_member, org['name']))
+
+def main(args):
+  id_member_who_left = find_id_member_by_email(args.email)
+  if not id_member_who_left:
+    print('There was no member found with the email %s' % args.email)
+    return 1
+
+  id_member_me = get_id_member_me()
+  for org in get_my_orgs():
+    deactivate_or_remove(org, id_member_who_left, id_member_me, execute=args.execute)
@@ -0,0 +1,55 @@
+# Helpers shared by the organization management commands (offboard and lockdown).
+
+from __future__ import print_function
+
+from trello.helper import query_trello
+from trello.profiling import span
+
+# First, let's get our member ID, so we can compare it later on
+def get_id_member_me():
+  resp = query_trello('GET', 'members/me', {'fields': 'id'})
+  with span("decode"):
+    return resp.json()['id']
+
+# Let's get a list of organizations that I belong to
+# docs: https://trello.com/docs/api/member/index.html#get-1-members-idmember-or-username-organizations
+#
+# Let's ask for the following info:
+# - name
+# - idBoards - so we can check out the boards in the orgs
+# - membersships - so we know which members belong to the org
+# - premiumFeatures - so we know what we can do with the org (if we've paid)
+def get_my_orgs():
+  resp = query_trello('GET', 'members/me/organizations', {'fields': 'name,idBoards,memberships,premiumFeatures'})
+  with span("decode"):
+    return resp.json()
+
+# Let's make a helper method to find a member based on id within an org
+def find_member(org, id_member):
+  for member in org['memberships']:
+    if member['idMember'] == id_member:
+      return member
+  return False
+
+#let's make a method to determine if I'm an admin for an org
+def am_i_admin(org, id_member_me):
+  member = find_member(org, id_member_me)
+  return (member and member['memberType'] == 'admin')
+
+#print the names of the orgs for which I'm an admin
+def print_admin_orgs():
+  id_member_me = get_id_member_me()
+  for org in get_my_orgs():
+    if am_i_admin(org, id_member_me):
+      print(org['name'])
+
+# Business Class org admins can admin all the boards in the org, even if they're
+# not explicitly members of that org.
+def am_i_super_admin(org, id_member_me):
+  org_has_super_admins = 'superAdmins' in org['premiumFeatures']
+  return org_has_super_admins and am_i_admin(org, id_member_me)
+
+def dry_run_prefix(execute):
+  if execute:
+    return ''
+  return 'dry run: '
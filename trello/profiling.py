@@ -0,0 +1,128 @@
+# Profiling for the trello commands.
+#
+# Add --profile to any command (e.g. `python -m trello audit --org <orgname> --profile`) to
+# time each stage of the run: fetch (waiting on the API), decode (parsing JSON), merge,
+# sort, render, and so on. Stages are marked in the code with `with span("fetch"):`, which
+# costs next to nothing when profiling is off. When the command finishes you get:
+#
+# - a per-stage summary on stderr: calls, total time, self time and share of the run
+# - a collapsed-stack file (one "audit;crawl;fetch <microseconds>" line per stack) that
+#   flame graph tools read directly, e.g. `flamegraph.pl trello-audit.folded > audit.svg`
+#   or speedscope
+#
+# --profile-cprofile also runs cProfile and writes its stats next to the collapsed-stack
+# file (read them with `python -m pstats`), and --profile-memory uses tracemalloc (Python 3)
+# to add the memory each stage allocated to the summary.
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+_clock = getattr(time, "perf_counter", time.time)
+_profile = None
+
+class Profile(object):
+  def __init__(self, root, trace_memory=False):
+    self.trace_memory = trace_memory
+    # each frame is [name, start, time spent in child spans, memory at start]
+    self.stack = [[root, _clock(), 0.0, self._memory()]]
+    self.self_times = {}  # "audit;crawl;fetch" -> seconds
+    self.stages = {}      # "fetch" -> [calls, total seconds, self seconds, bytes allocated]
+
+  def _memory(self):
+    if not self.trace_memory:
+      return 0
+    import tracemalloc
+    return tracemalloc.get_traced_memory()[0]
+
+  def enter(self, name):
+    self.stack.append([name, _clock(), 0.0, self._memory()])
+
+  def exit(self):
+    name, start, child_time, memory_start = self.stack.pop()
+    elapsed = _clock() - start
+    self._record(name, elapsed, elapsed - child_time, self._memory() - memory_start)
+    self.stack[-1][2] += elapsed
+
+  def _record(self, name, elapsed, self_time, allocated):
+    path = ";".join([frame[0] for frame in self.stack] + [name])
+    self.self_times[path] = self.self_times.get(path, 0.0) + self_time
+    stage = self.stages.setdefault(name, [0, 0.0, 0.0, 0])
+    stage[0] += 1
+    stage[1] += elapsed
+    stage[2] += self_time
+    stage[3] += allocated
+
+  def finish(self):
+    name, start, child_time, memory_start = self.stack.pop()
+    self.wall_time = _clock() - start
+    self._record(name, self.wall_time, self.wall_time - child_time, self._memory() - memory_start)
+
+  def write_collapsed(self, path):
+    with open(path, "w") as f:
+      for stack, seconds in sorted(self.self_times.items()):
+        f.write("%s %d\n" % (stack, round(seconds * 1e6)))
+
+  def print_summary(self, out=sys.stderr):
+    header = ["stage", "calls", "total ms", "self ms", "% of run"]
+    if self.trace_memory:
+      header.append("alloc KB")
+    rows = []
+    for name, (calls, total, self_time, allocated) in sorted(self.stages.items(), key=lambda s: -s[1][2]):
+      row = [name, str(calls), "%.1f" % (total * 1000), "%.1f" % (self_time * 1000),
+             "%.1f" % (100.0 * self_time / self.wall_time if self.wall_time else 0)]
+      if self.trace_memory:
+        row.append("%.1f" % (allocated / 1024.0))
+      rows.append(row)
+
+    widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+    for r in [header] + rows:
+      print("  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(r, widths))), file=out)
+
+@contextmanager
+def span(name):
+  profile = _profile
+  if profile is None:
+    yield
+    return
+  profile.enter(name)
+  try:
+    yield
+  finally:
+    profile.exit()
+
+@contextmanager
+def profiled(command, out_path, use_cprofile=False, trace_memory=False):
+  global _profile
+  if trace_memory:
+    import tracemalloc
+    tracemalloc.start()
+  cprofiler = None
+  if use_cprofile:
+    import cProfile
+    cprofiler = cProfile.Profile()
+
+  _profile = Profile(command, trace_memory)
+  if cprofiler:
+    cprofiler.enable()
+  try:
+    yield _profile
+  finally:
+    if cprofiler:
+      cprofiler.disable()
+    profile, _profile = _profile, None
+    profile.finish()
+    if trace_memory:
+      tracemalloc.stop()
+
+    profile.write_collapsed(out_path)
+    print("", file=sys.stderr)
+    profile.print_summary()
+    print("collapsed stacks written to %s" % out_path, file=sys.stderr)
+    if cprofiler:
+      pstats_path = os.path.splitext(out_path)[0] + ".pstats"
+      cprofiler.dump_stats(pstats_path)
+      print("cProfile stats written to %s" % pstats_path, file=sys.stderr)
@@ -0,0 +1,83 @@
+# Saving and loading audit snapshots.
+#
+# A snapshot is what the audit crawled, flattened into three tables so it's cheap to store
+# and to compare against another run (see trello/diff.py):
+#
+# - members: everyone who is in the org or on one of its boards
+# - boards: the org's boards
+# - memberships: one row per (member, board) pair, by board and then member
+#
+# Save one with `python -m trello audit --org <orgname> --save snapshot.json`. Paths that
+# end in .gz are gzipped, and paths that end in .trsnap are written in the compact columnar
+# format from trello/archive.py.
+
+import gzip
+import json
+
+MEMBER_FIELDS = ["id", "username", "fullName", "org_member", "org_member_type", "org_deactivated", "org_unconfirmed"]
+BOARD_FIELDS = ["id", "name", "shortUrl", "closed"]
+MEMBERSHIP_FIELDS = ["idMember", "idBoard", "memberType", "unconfirmed", "deactivated"]
+
+def build_snapshot(id_org, org_memberships, org_boards, board_memberships_by_board):
+  members = []
+  member_index = {}
+  for membership in org_memberships:
+    member = membership["member"]
+    member_index[membership["idMember"]] = len(members)
+    members.append([membership["idMember"], member.get("username"), member.get("fullName"), True,
+                    membership["memberType"], membership["deactivated"], membership["unconfirmed"]])
+
+  boards = []
+  memberships = []
+  for board in org_boards:
+    boards.append([board["id"], board.get("name"), board.get("shortUrl"), board.get("closed")])
+    board_memberships = []
+    for board_membership in board_memberships_by_board[board["id"]]:
+      id_member = board_membership["idMember"]
+      if id_member not in member_index:
+        member = board_membership.get("member", {})
+        member_index[id_member] = len(members)
+        members.append([id_member, member.get("username"), member.get("fullName"), False, None, False, None])
+      board_memberships.append([id_member, board["id"], board_membership["memberType"],
+                                board_membership["unconfirmed"], board_membership["deactivated"]])
+    # in member order within each board, which is how archives store them
+    board_memberships.sort(key=lambda row: member_index[row[0]])
+    memberships.extend(board_memberships)
+
+  return {
+    "org": id_org,
+    "members": {"fields": MEMBER_FIELDS, "rows": members},
+    "boards": {"fields": BOARD_FIELDS, "rows": boards},
+    "memberships": {"fields": MEMBERSHIP_FIELDS, "rows": memberships},
+  }
+
+def _open(path, mode):
+  if path.endswith(".gz"):
+    return gzip.open(path, mode)
+  return open(path, mode)
+
+# `base` is only for .trsnap archives: save just what changed since that earlier archive
+def save_snapshot(snapshot, path, base=None):
+  from trello.archive import ARCHIVE_EXTENSION, write_archive
+  if path.endswith(ARCHIVE_EXTENSION):
+    write_archive(snapshot, path, base=base)
+    return
+  if base is not None:
+    raise ValueError("only %s archives can be saved against a base" % ARCHIVE_EXTENSION)
+
+  with _open(path, "wb") as f:
+    f.write(json.dumps(snapshot, separators=(",", ":")).encode("utf-8"))
+
+def load_snapshot(path):
+  from trello.archive import is_archive, read_archive
+  if is_archive(path):
+    return read_archive(path)
+
+  with _open(path, "rb") as f:
+    return json.loads(f.read().decode("utf-8"))
+
+# yields each row of a snapshot table as a dict, e.g. iter_rows(snapshot, "members")
+def iter_rows(snapshot, table):
+  fields = snapshot[table]["fields"]
+  for row in snapshot[table]["rows"]:
+    yield dict(zip(fields, row))
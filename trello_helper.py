@@ -1,20 +1,4 @@
-from requests import Request, Session
-from settings import trello_key, trello_token
-import requests
-import json
+# query_trello now lives in trello/helper.py. This module sticks around so scripts
+# that do `from trello_helper import query_trello` keep working.
 
-def query_trello(method, url, data=None):
-  BASE_URL = 'https://trello.com/1/'
-  params_key_and_token = {'key':trello_key,'token':trello_token}
-  url = BASE_URL + url
-  s = Session()
-  req = Request(method, url,
-      data=data,
-      params=params_key_and_token
-  )
-
-  prepped = s.prepare_request(req)
-
-  resp = s.send(prepped)
-
-  return resp
\ No newline at end of file
+from trello.helper import query_trello